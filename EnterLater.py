@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
-import subprocess
 import threading
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from tkinter import (
     Tk, StringVar, BooleanVar,
     Frame, Label, Entry, Button, Checkbutton, BOTH, X, LEFT, RIGHT
@@ -11,6 +9,9 @@ from tkinter import messagebox
 
 import sys
 
+from enterlater import ReadinessGate, Scheduler, StatusExporter, parse_time_of_day, xdotool
+from enterlater import FIRED, FAILED
+
 # Tray icon deps
 try:
     import pystray
@@ -21,6 +22,9 @@ except ImportError:
     ImageDraw = None
     ImageFont = None
 
+# Longest the "wait until target is idle" option holds back the keystroke
+IDLE_GATE_MAX_WAIT = 60
+
 
 class EnterLaterApp:
     def __init__(self, root: Tk):
@@ -31,11 +35,17 @@ class EnterLaterApp:
         # Keep window on top
         self.root.attributes("-topmost", True)
 
+        # Window manager close button: same cleanup as Quit
+        self.root.protocol("WM_DELETE_WINDOW", self.quit_app)
+
         # State
         self.target_datetime = None
         self.timer_running = False
-        self.timer_thread = None
-        self.stop_event = threading.Event()
+        self.countdown_after_id = None
+
+        # Alarm engine (scheduling + keystroke injection)
+        self.scheduler = Scheduler()
+        self.alarm = None
 
         # Target / window tracking
         self.target_window_id = None
@@ -57,11 +67,15 @@ class EnterLaterApp:
         # Tray icon
         self.tray_icon = None
 
+        # Status file / socket for status bars and external monitors
+        self.status_exporter = StatusExporter()
+
         # Tk variables
         self.time_input = StringVar(value="10:00 PM")  # default example
         self.text_to_type = StringVar(value="")
         self.type_text_first = BooleanVar(value=False)
         self.use_live_active = BooleanVar(value=True)  # toggle for live vs captured
+        self.wait_until_idle = BooleanVar(value=False)  # readiness gate on target process
 
         self.status_text = StringVar(value="Alarm not set")
         self.countdown_text = StringVar(value="--:--:--")
@@ -71,6 +85,7 @@ class EnterLaterApp:
         self._build_ui()
         self._init_tray_icon()
         self._start_polling_external_window()
+        self._start_status_export()
 
     def _build_ui(self):
         padding = {"padx": 10, "pady": 5}
@@ -108,6 +123,15 @@ class EnterLaterApp:
             variable=self.use_live_active
         ).pack(side=LEFT)
 
+        # Readiness gate toggle
+        row3c = Frame(main_frame)
+        row3c.pack(fill=X, pady=3)
+        Checkbutton(
+            row3c,
+            text=f"Wait until target is idle (max {IDLE_GATE_MAX_WAIT}s)",
+            variable=self.wait_until_idle
+        ).pack(side=LEFT)
+
         # Target time display
         row4 = Frame(main_frame)
         row4.pack(fill=X, pady=3)
@@ -243,61 +267,34 @@ class EnterLaterApp:
             return
         self.root.withdraw()
 
-    # --- Time parsing --------------------------------------------------------
-
-    def parse_time_of_day(self, text: str) -> datetime:
-        """
-        Accepts:
-          - '22:01'
-          - '10:01 PM'
-          - '3:00 pm'
-          - '10:01pm' (no space)
-        Returns a datetime for the *next occurrence* of that time (today or tomorrow).
-        """
-        raw = text.strip()
-        if not raw:
-            raise ValueError("Time cannot be empty.")
+    # --- Status export -------------------------------------------------------
 
-        now = datetime.now()
-
-        # Normalize: remove spaces, uppercase
-        norm = raw.upper().replace(" ", "")
-
-        # Try to detect AM/PM
-        is_12h = norm.endswith("AM") or norm.endswith("PM")
-
-        if is_12h:
-            period = norm[-2:]         # AM/PM
-            time_part = norm[:-2]      # e.g. '10:01'
-            # Insert a space again for strptime
-            time_str_for_parse = f"{time_part} {period}"
-            try:
-                t = datetime.strptime(time_str_for_parse, "%I:%M %p").time()
-            except ValueError:
-                raise ValueError("Invalid 12-hour time format. Try like '10:01 PM' or '3:00 PM'.")
-        else:
-            # 24-hour format e.g. 22:01
-            try:
-                t = datetime.strptime(norm, "%H:%M").time()
-            except ValueError:
-                raise ValueError("Invalid 24-hour time format. Try '22:01' or '10:01 PM'.")
-
-        candidate = datetime(
-            year=now.year,
-            month=now.month,
-            day=now.day,
-            hour=t.hour,
-            minute=t.minute,
-            second=0,
-            microsecond=0,
-        )
-
-        # If the time has already passed today, schedule for tomorrow.
-        # (If system sleeps *past* the target, the loop still fires it on wake.)
-        if candidate <= now:
-            candidate = candidate + timedelta(days=1)
+    def _start_status_export(self):
+        try:
+            self.status_exporter.start()
+        except OSError:
+            return
 
-        return candidate
+        for var in (
+            self.status_text,
+            self.target_time_label_text,
+            self.target_window_label_text,
+        ):
+            var.trace_add("write", lambda *_: self._publish_status())
+        self._publish_status()
+
+    def _publish_status(self):
+        """Export current alarm state; StatusExporter skips unchanged states."""
+        next_alarm = None
+        if self.timer_running and self.target_datetime is not None:
+            next_alarm = self.target_datetime.isoformat()
+
+        self.status_exporter.publish({
+            "next_alarm": next_alarm,
+            "target_time": self.target_time_label_text.get(),
+            "target_window": self.target_window_label_text.get(),
+            "status": self.status_text.get(),
+        })
 
     # --- Window capture / tracking ------------------------------------------
 
@@ -340,73 +337,23 @@ class EnterLaterApp:
         if not (self.timer_running and self.use_live_active.get()):
             return
 
-        try:
-            win_id_proc = subprocess.run(
-                ["xdotool", "getactivewindow"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                check=True,
-                text=True,
-            )
-            win_id_str = win_id_proc.stdout.strip()
-            self.live_window_id = int(win_id_str) if win_id_str else None
-        except (subprocess.CalledProcessError, ValueError):
-            self.live_window_id = None
+        self.live_window_id = xdotool.get_active_window()
+        if self.live_window_id is None:
             self.live_window_title = None
             self.live_window_proc = None
             self.target_window_label_text.set("Active window unknown")
         else:
-            # Get title
-            title = "Unknown title"
-            try:
-                title_proc = subprocess.run(
-                    ["xdotool", "getwindowname", str(self.live_window_id)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.DEVNULL,
-                    check=True,
-                    text=True,
-                )
-                if title_proc.stdout.strip():
-                    title = title_proc.stdout.strip()
-            except subprocess.CalledProcessError:
-                pass
-            self.live_window_title = title
-
-            # Get PID / process
-            proc_desc = None
-            try:
-                pid_proc = subprocess.run(
-                    ["xdotool", "getwindowpid", str(self.live_window_id)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.DEVNULL,
-                    check=True,
-                    text=True,
-                )
-                pid_str = pid_proc.stdout.strip()
-                if pid_str:
-                    ps_proc = subprocess.run(
-                        ["ps", "-p", pid_str, "-o", "comm="],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.DEVNULL,
-                        check=True,
-                        text=True,
-                    )
-                    pname = ps_proc.stdout.strip()
-                    if pname:
-                        proc_desc = f"{pname} (PID {pid_str})"
-            except subprocess.CalledProcessError:
-                pass
-            self.live_window_proc = proc_desc
+            self.live_window_title = (
+                xdotool.get_window_name(self.live_window_id) or "Unknown title"
+            )
+            self.live_window_proc = xdotool.describe_window_process(self.live_window_id)
 
             # Update label
-            if self.live_window_id is None:
-                self.target_window_label_text.set("Active window unknown")
+            if self.live_window_proc:
+                label = f"[LIVE] {self.live_window_title} — {self.live_window_proc}"
             else:
-                if self.live_window_proc:
-                    label = f"[LIVE] {self.live_window_title} — {self.live_window_proc}"
-                else:
-                    label = f"[LIVE] {self.live_window_title} (process unknown)"
-                self.target_window_label_text.set(label)
+                label = f"[LIVE] {self.live_window_title} (process unknown)"
+            self.target_window_label_text.set(label)
 
         # Schedule next poll
         self.window_poll_after_id = self.root.after(1000, self._track_active_window)
@@ -429,84 +376,18 @@ class EnterLaterApp:
         Continuously tracks the active window. If it's NOT the EnterLater window,
         stores it as the last external window for use in captured mode.
         """
-        try:
-            # Get active window
-            win_id_proc = subprocess.run(
-                ["xdotool", "getactivewindow"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                check=True,
-                text=True,
-            )
-            win_id_str = win_id_proc.stdout.strip()
-            if not win_id_str:
-                # Schedule next poll and return
-                self.external_window_poll_after_id = self.root.after(1000, self._poll_external_window)
-                return
-
-            active_window_id = int(win_id_str)
-
+        active_window_id = xdotool.get_active_window()
+        if active_window_id is not None:
             # Get our own window ID to compare
-            our_window_id = None
-            try:
-                our_window_id_proc = subprocess.run(
-                    ["xdotool", "search", "--name", "^EnterLater$"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.DEVNULL,
-                    check=True,
-                    text=True,
-                )
-                # May return multiple lines; take the first
-                our_window_id_str = our_window_id_proc.stdout.strip().split('\n')[0]
-                if our_window_id_str:
-                    our_window_id = int(our_window_id_str)
-            except (subprocess.CalledProcessError, ValueError, IndexError):
-                pass
+            our_window_id = xdotool.find_window_by_name("^EnterLater$")
 
             # If active window is NOT our window, store it
             if our_window_id is None or active_window_id != our_window_id:
                 self.last_external_window_id = active_window_id
-
-                # Get title
-                try:
-                    title_proc = subprocess.run(
-                        ["xdotool", "getwindowname", str(active_window_id)],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.DEVNULL,
-                        check=True,
-                        text=True,
-                    )
-                    self.last_external_window_title = title_proc.stdout.strip() or "Unknown title"
-                except subprocess.CalledProcessError:
-                    self.last_external_window_title = "Unknown title"
-
-                # Get process info
-                self.last_external_window_proc = None
-                try:
-                    pid_proc = subprocess.run(
-                        ["xdotool", "getwindowpid", str(active_window_id)],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.DEVNULL,
-                        check=True,
-                        text=True,
-                    )
-                    pid_str = pid_proc.stdout.strip()
-                    if pid_str:
-                        ps_proc = subprocess.run(
-                            ["ps", "-p", pid_str, "-o", "comm="],
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.DEVNULL,
-                            check=True,
-                            text=True,
-                        )
-                        proc_name = ps_proc.stdout.strip()
-                        if proc_name:
-                            self.last_external_window_proc = f"{proc_name} (PID {pid_str})"
-                except subprocess.CalledProcessError:
-                    pass
-
-        except (subprocess.CalledProcessError, ValueError):
-            pass
+                self.last_external_window_title = (
+                    xdotool.get_window_name(active_window_id) or "Unknown title"
+                )
+                self.last_external_window_proc = xdotool.describe_window_process(active_window_id)
 
         # Schedule next poll
         self.external_window_poll_after_id = self.root.after(1000, self._poll_external_window)
@@ -527,12 +408,12 @@ class EnterLaterApp:
     # --- Alarm / timer logic -------------------------------------------------
 
     def start_alarm(self):
-        if self.timer_running:
+        if self.timer_running or self.alarm is not None:
             messagebox.showinfo("Already set", "Alarm is already running.")
             return
 
         # Check xdotool exists (graceful error)
-        if not self._xdotool_available():
+        if not xdotool.available():
             messagebox.showerror(
                 "xdotool not found",
                 "EnterLater requires xdotool.\n\nInstall it with:\n\nsudo apt install xdotool"
@@ -540,13 +421,12 @@ class EnterLaterApp:
             return
 
         try:
-            target = self.parse_time_of_day(self.time_input.get())
+            target = parse_time_of_day(self.time_input.get())
         except ValueError as e:
             messagebox.showerror("Invalid time", str(e))
             return
 
         self.target_datetime = target
-        self.stop_event.clear()
         self.timer_running = True
 
         pretty_target = self.target_datetime.strftime("%Y-%m-%d %I:%M %p")
@@ -555,7 +435,7 @@ class EnterLaterApp:
         # Window mode
         if self.use_live_active.get():
             # Live active mode: keep tracking current active window
-            self.target_window_id = None  # not used in this mode
+            self.target_window_id = None  # engine uses the active window at fire time
             self.status_text.set("Alarm set. Will fire into the active window at alarm time.")
             self._start_tracking_active_window()
         else:
@@ -564,37 +444,90 @@ class EnterLaterApp:
             self._capture_active_window()
             self.status_text.set("Alarm set. Will fire into the captured window at alarm time.")
 
-        self._update_countdown_label()
+        text = self.text_to_type.get()
+        do_type = self.type_text_first.get() and bool(text.strip())
 
-        self.timer_thread = threading.Thread(target=self._timer_loop, daemon=True)
-        self.timer_thread.start()
+        gate = None
+        if self.wait_until_idle.get():
+            gate = ReadinessGate(max_wait=IDLE_GATE_MAX_WAIT)
 
-    def _timer_loop(self):
-        while not self.stop_event.is_set():
-            now = datetime.now()
-            remaining = (self.target_datetime - now).total_seconds()
-            if remaining <= 0:
-                break
+        self.alarm = self.scheduler.schedule(
+            self.target_datetime,
+            text=text if do_type else "",
+            window_id=self.target_window_id,
+            gate=gate,
+        )
+        self.alarm.add_done_callback(
+            lambda handle: self.root.after(0, self._alarm_finished, handle)
+        )
 
-            self.root.after(0, self._update_countdown_label)
-            time.sleep(1)
+        self._tick_countdown()
 
-        if self.stop_event.is_set():
+    def _tick_countdown(self):
+        self.countdown_after_id = None
+        if not self.timer_running:
             return
 
-        # Time reached (even if system slept past it, this will run on wake)
-        self.root.after(0, self._alarm_triggered)
+        self._update_countdown_label()
+        if (self.target_datetime - datetime.now()).total_seconds() <= 0:
+            self._alarm_triggered()
+            return
+
+        self.countdown_after_id = self.root.after(1000, self._tick_countdown)
+
+    def _stop_countdown(self):
+        if self.countdown_after_id is not None:
+            self.root.after_cancel(self.countdown_after_id)
+            self.countdown_after_id = None
 
     def _alarm_triggered(self):
         self.timer_running = False
         self._stop_tracking_active_window()
-        self.status_text.set("Alarm firing keystroke...")
+        if self.alarm is not None and self.alarm.gate is not None:
+            # Cancel still works until the handle finishes
+            self.status_text.set(
+                f"Waiting for target to be ready (up to {self.alarm.gate.max_wait:.0f}s)..."
+            )
+        else:
+            self.status_text.set("Alarm firing keystroke...")
         self.countdown_text.set("00:00:00")
 
-        threading.Thread(target=self._perform_keystroke, daemon=True).start()
+    def _alarm_finished(self, handle):
+        if handle is not self.alarm:
+            return
+        self.alarm = None
+        if handle.state not in (FIRED, FAILED):
+            return  # Cancelled; cancel_alarm() already updated the labels
+
+        # Keystroke may finish before the countdown tick notices the alarm fired
+        if self.timer_running:
+            self._stop_countdown()
+            self._alarm_triggered()
+
+        if handle.state == FIRED:
+            if handle.gate_skipped:
+                self.status_text.set(
+                    f"Could not check target ({handle.gate_skipped}); keystroke sent without waiting. Alarm not set."
+                )
+            elif handle.gate_timed_out:
+                self.status_text.set(
+                    f"Target still busy after {handle.gated_for:.0f}s; keystroke sent anyway. Alarm not set."
+                )
+            elif handle.gated_for >= 0.1:
+                self.status_text.set(
+                    f"Keystroke sent after waiting {handle.gated_for:.1f}s for target. Alarm not set."
+                )
+            else:
+                self.status_text.set("Keystroke sent. Alarm not set.")
+        else:
+            self.status_text.set(handle.error)
 
     def cancel_alarm(self):
-        if not self.timer_running:
+        if self.alarm is not None and not self.alarm.cancel():
+            # Already typing (or just finished); _alarm_finished() reports it
+            return
+
+        if not self.timer_running and self.alarm is None:
             self.status_text.set("Alarm not set")
             self.countdown_text.set("--:--:--")
             self.target_time_label_text.set("No target time")
@@ -602,8 +535,9 @@ class EnterLaterApp:
             self._stop_tracking_active_window()
             return
 
-        self.stop_event.set()
+        self.alarm = None
         self.timer_running = False
+        self._stop_countdown()
         self._stop_tracking_active_window()
         self.status_text.set("Alarm cancelled.")
         self.countdown_text.set("--:--:--")
@@ -611,9 +545,11 @@ class EnterLaterApp:
         self.target_window_label_text.set("No target window")
 
     def quit_app(self):
-        self.stop_event.set()
+        self.scheduler.shutdown()
+        self._stop_countdown()
         self._stop_tracking_active_window()
         self._stop_polling_external_window()
+        self.status_exporter.close()
         # Stop tray icon if present
         if self.tray_icon is not None:
             try:
@@ -638,78 +574,6 @@ class EnterLaterApp:
         seconds = remaining % 60
         self.countdown_text.set(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
 
-    # --- Keystroke logic -----------------------------------------------------
-
-    def _perform_keystroke(self):
-        text = self.text_to_type.get()
-        do_type = self.type_text_first.get() and bool(text.strip())
-
-        try:
-            window_id_to_use = None
-
-            if self.use_live_active.get():
-                # Live mode: just grab current active window right now
-                try:
-                    win_id_proc = subprocess.run(
-                        ["xdotool", "getactivewindow"],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.DEVNULL,
-                        check=True,
-                        text=True,
-                    )
-                    win_id_str = win_id_proc.stdout.strip()
-                    if win_id_str:
-                        window_id_to_use = int(win_id_str)
-                except (subprocess.CalledProcessError, ValueError):
-                    window_id_to_use = None
-            else:
-                # Captured mode
-                window_id_to_use = self.target_window_id
-
-            # Try to activate window (if known)
-            if window_id_to_use is not None:
-                try:
-                    subprocess.run(
-                        ["xdotool", "windowactivate", "--sync", str(window_id_to_use)],
-                        check=True
-                    )
-                except subprocess.CalledProcessError:
-                    # If activation fails, fall back to whatever is active
-                    pass
-
-            if do_type:
-                subprocess.run(["xdotool", "type", "--delay", "0", text], check=True)
-                subprocess.run(["xdotool", "key", "Return"], check=True)
-            else:
-                subprocess.run(["xdotool", "key", "Return"], check=True)
-
-            self.root.after(0, lambda: self.status_text.set("Keystroke sent. Alarm not set."))
-
-        except subprocess.CalledProcessError as e:
-            self.root.after(
-                0,
-                lambda: self.status_text.set(f"Error sending keys via xdotool (exit {e.returncode}).")
-            )
-        except FileNotFoundError:
-            self.root.after(
-                0,
-                lambda: self.status_text.set("xdotool not found. Install with: sudo apt install xdotool")
-            )
-
-    # --- xdotool presence ----------------------------------------------------
-
-    def _xdotool_available(self) -> bool:
-        try:
-            subprocess.run(
-                ["xdotool", "--version"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=False,
-            )
-            return True
-        except FileNotFoundError:
-            return False
-
 
 def main():
     root = Tk()
@@ -0,0 +1,45 @@
+"""
+EnterLater engine: time parsing, alarm scheduling and keystroke injection.
+Importable without tkinter; the GUI lives in EnterLater.py.
+"""
+from .engine import (
+    AlarmHandle,
+    Scheduler,
+    inject_keystroke,
+    parse_time_of_day,
+    resolve_when,
+    PENDING,
+    GATING,
+    FIRING,
+    FIRED,
+    FAILED,
+    CANCELLED,
+)
+
+__all__ = [
+    "AlarmHandle",
+    "ReadinessGate",
+    "Scheduler",
+    "StatusExporter",
+    "inject_keystroke",
+    "parse_time_of_day",
+    "resolve_when",
+    "PENDING",
+    "GATING",
+    "FIRING",
+    "FIRED",
+    "FAILED",
+    "CANCELLED",
+]
+
+
+def __getattr__(name):
+    # Loaded on demand: these pull in subprocess/socket/json/tempfile,
+    # which scripts that only schedule alarms don't need.
+    if name == "StatusExporter":
+        from .status import StatusExporter
+        return StatusExporter
+    if name == "ReadinessGate":
+        from .readiness import ReadinessGate
+        return ReadinessGate
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,474 @@
+"""
+Alarm scheduling and keystroke injection, independent of the GUI.
+
+    from enterlater import Scheduler
+
+    scheduler = Scheduler()
+    handles = scheduler.schedule_many(
+        {"when": "10:00 PM", "text": "make deploy"} for _ in range(1000)
+    )
+    handles[0].cancel()
+    handles[1].wait()
+"""
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+
+PENDING = "pending"
+GATING = "gating"  # Due, waiting on its readiness gate
+FIRING = "firing"
+FIRED = "fired"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Keys accepted in a schedule_many() dict item
+ALARM_FIELDS = ("when", "text", "press_enter", "window_id", "gate")
+
+# Longest the timer thread sleeps between wall-clock checks, so alarms
+# still fire promptly when the system wakes from suspend past their time.
+MAX_SLEEP = 1.0
+
+
+def parse_time_of_day(text: str, now: datetime = None) -> datetime:
+    """
+    Accepts:
+      - '22:01'
+      - '10:01 PM'
+      - '3:00 pm'
+      - '10:01pm' (no space)
+    Returns a datetime for the *next occurrence* of that time (today or tomorrow).
+    """
+    raw = text.strip()
+    if not raw:
+        raise ValueError("Time cannot be empty.")
+
+    if now is None:
+        now = datetime.now()
+
+    # Normalize: remove spaces, uppercase
+    norm = raw.upper().replace(" ", "")
+
+    # Try to detect AM/PM
+    is_12h = norm.endswith("AM") or norm.endswith("PM")
+
+    if is_12h:
+        period = norm[-2:]         # AM/PM
+        time_part = norm[:-2]      # e.g. '10:01'
+        # Insert a space again for strptime
+        time_str_for_parse = f"{time_part} {period}"
+        try:
+            t = datetime.strptime(time_str_for_parse, "%I:%M %p").time()
+        except ValueError:
+            raise ValueError("Invalid 12-hour time format. Try like '10:01 PM' or '3:00 PM'.")
+    else:
+        # 24-hour format e.g. 22:01
+        try:
+            t = datetime.strptime(norm, "%H:%M").time()
+        except ValueError:
+            raise ValueError("Invalid 24-hour time format. Try '22:01' or '10:01 PM'.")
+
+    candidate = datetime(
+        year=now.year,
+        month=now.month,
+        day=now.day,
+        hour=t.hour,
+        minute=t.minute,
+        second=0,
+        microsecond=0,
+    )
+
+    # If the time has already passed today, schedule for tomorrow.
+    # (If system sleeps *past* the target, the scheduler still fires it on wake.)
+    if candidate <= now:
+        candidate = candidate + timedelta(days=1)
+
+    return candidate
+
+
+def resolve_when(when, now: datetime = None) -> datetime:
+    """
+    Turn a datetime, a delay (timedelta) or a time-of-day string into a
+    naive local datetime. Timezone-aware datetimes are converted to local time.
+    """
+    if isinstance(when, datetime):
+        if when.tzinfo is not None:
+            when = when.astimezone().replace(tzinfo=None)
+        return when
+    if now is None:
+        now = datetime.now()
+    if isinstance(when, timedelta):
+        return now + when
+    if isinstance(when, str):
+        return parse_time_of_day(when, now)
+    raise ValueError(f"Unsupported alarm time: {when!r}")
+
+
+def _run_callback(fn, handle: "AlarmHandle"):
+    """Call a done-callback; a failing callback is logged, never propagated."""
+    try:
+        fn(handle)
+    except Exception:
+        # Imported here: logging is only needed when a callback misbehaves
+        import logging
+        logging.getLogger(__name__).exception(
+            "Exception in done-callback %r for %r", fn, handle
+        )
+
+
+def inject_keystroke(handle: "AlarmHandle"):
+    """
+    Default injector: activate the alarm's window (or use whatever is active
+    at fire time), then type text + Enter via xdotool.
+    """
+    from . import xdotool
+
+    window_id = handle.target_window_id
+    if window_id is None:
+        window_id = xdotool.get_active_window()
+
+    # If activation fails, fall back to whatever is active
+    if window_id is not None:
+        xdotool.activate_window(window_id)
+
+    xdotool.send_keys(handle.text, handle.press_enter)
+
+
+class AlarmHandle:
+    """A scheduled alarm. Returned by Scheduler.schedule() / schedule_many()."""
+
+    def __init__(self, scheduler: "Scheduler", fire_at: datetime, text: str,
+                 press_enter: bool, window_id: int, gate=None):
+        self.fire_at = fire_at
+        self.text = text
+        self.press_enter = press_enter
+        self.window_id = window_id
+        self.gate = gate  # Optional ReadinessGate
+
+        self.state = PENDING
+        self.error = None  # Error message if state is FAILED
+        self.fired_at = None
+        self.gated_for = 0.0  # Seconds spent waiting on the readiness gate
+        self.gate_timed_out = False
+        self.gate_skipped = None  # Why the readiness gate could not run, if it didn't
+        # Window the readiness gate checked; the injector types into it
+        self.target_window_id = window_id
+
+        self._scheduler = scheduler
+        self._done = threading.Event()
+        # Aborts a readiness gate wait; only gated alarms need one
+        self._cancel_event = threading.Event() if gate is not None else None
+        self._callbacks = []
+
+    def __repr__(self):
+        return f"<AlarmHandle {self.fire_at:%Y-%m-%d %H:%M:%S} {self.state}>"
+
+    def cancel(self) -> bool:
+        """
+        Cancel the alarm, including while it waits on its readiness gate.
+        Returns False if it is already typing or done.
+        """
+        return self._scheduler._cancel(self)
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the alarm fires, fails or is cancelled. Returns done()."""
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, fn):
+        """
+        Call fn(handle) once the alarm is done. Runs on the scheduler's
+        injector thread, or immediately if the alarm is already done.
+        Exceptions raised by fn are logged and otherwise ignored.
+        """
+        with self._scheduler._lock:
+            if not self._done.is_set():
+                self._callbacks.append(fn)
+                return
+        _run_callback(fn, self)
+
+    def __await__(self):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(_handle):
+            def set_result():
+                if not future.done():
+                    future.set_result(self)
+            try:
+                loop.call_soon_threadsafe(set_result)
+            except RuntimeError:
+                pass  # Event loop already closed; nobody is awaiting any more
+
+        self.add_done_callback(resolve)
+        return future.__await__()
+
+    def _finish(self, state: str, error: str = None):
+        with self._scheduler._lock:
+            self.state = state
+            self.error = error
+            callbacks, self._callbacks = self._callbacks, []
+            self._done.set()
+        for fn in callbacks:
+            _run_callback(fn, self)
+
+
+class Scheduler:
+    """
+    Fires alarms at their wall-clock time. A single timer thread watches a
+    heap of pending alarms; due alarms are handed to a single injector
+    thread so keystrokes from alarms due together never interleave.
+    A due alarm with a readiness gate waits on its own gate thread and
+    reaches the injector only once ready, so it never delays other alarms.
+    """
+
+    def __init__(self, injector=inject_keystroke):
+        self.injector = injector
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._heap = []
+        self._dead = 0  # Cancelled entries still sitting in the heap
+        self._seq = itertools.count()
+        self._due = []
+        self._due_ready = threading.Condition(self._lock)
+        self._gating = set()
+        self._threads = []
+        self._stopped = False
+
+    # --- Scheduling ----------------------------------------------------------
+
+    def schedule(self, when, text: str = "", press_enter: bool = True,
+                 window_id: int = None, gate=None) -> AlarmHandle:
+        """
+        Schedule one alarm. `when` is a datetime, a delay (timedelta), or a
+        time-of-day string accepted by parse_time_of_day(). `window_id` of
+        None targets whatever window is active at fire time. `gate` is an
+        optional ReadinessGate checked before typing.
+        """
+        return self.schedule_many([{
+            "when": when,
+            "text": text,
+            "press_enter": press_enter,
+            "window_id": window_id,
+            "gate": gate,
+        }])[0]
+
+    def schedule_many(self, alarms) -> list:
+        """
+        Validate and schedule many alarms in one pass. Each item is either a
+        `when` value or a dict of schedule() keyword arguments. If any item
+        is invalid, a ValueError naming it is raised and nothing is scheduled.
+        """
+        now = datetime.now()
+        handles = []
+        for index, spec in enumerate(alarms):
+            if not isinstance(spec, dict):
+                spec = {"when": spec}
+            unknown = [key for key in spec if key not in ALARM_FIELDS]
+            if unknown:
+                raise ValueError(f"Alarm #{index}: unknown field {unknown[0]!r}")
+            if "when" not in spec:
+                raise ValueError(f"Alarm #{index}: missing 'when'")
+            try:
+                handles.append(self._make_handle(now, **spec))
+            except (TypeError, ValueError, OverflowError) as e:
+                raise ValueError(f"Alarm #{index}: {e}") from None
+
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("Scheduler has been shut down.")
+            entries = [(h.fire_at, next(self._seq), h) for h in handles]
+            if len(entries) > len(self._heap):
+                self._heap.extend(entries)
+                heapq.heapify(self._heap)
+            else:
+                for entry in entries:
+                    heapq.heappush(self._heap, entry)
+            self._ensure_threads()
+            self._wakeup.notify()
+        return handles
+
+    def _make_handle(self, now: datetime, when, text: str = "",
+                     press_enter: bool = True, window_id: int = None,
+                     gate=None) -> AlarmHandle:
+        if not isinstance(text, str):
+            raise ValueError(f"Text must be a string, not {type(text).__name__}.")
+        if not text and not press_enter:
+            raise ValueError("Alarm would send nothing (no text and press_enter=False).")
+        if window_id is not None:
+            window_id = int(window_id)
+        if gate is not None and not callable(getattr(gate, "wait", None)):
+            raise ValueError("Gate must be a ReadinessGate.")
+        return AlarmHandle(
+            self, resolve_when(when, now), text, bool(press_enter), window_id, gate
+        )
+
+    def pending(self) -> list:
+        """Pending alarms, soonest first."""
+        with self._lock:
+            return [h for _, _, h in sorted(self._heap) if h.state == PENDING]
+
+    def next_alarm(self):
+        with self._lock:
+            self._drop_cancelled()
+            return self._heap[0][2] if self._heap else None
+
+    def cancel_all(self) -> int:
+        """Cancel every pending or gating alarm. Returns how many were cancelled."""
+        with self._lock:
+            gating = list(self._gating)
+        return sum(1 for h in self.pending() + gating if h.cancel())
+
+    def shutdown(self):
+        """Cancel all pending alarms and stop the scheduler threads."""
+        self.cancel_all()
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify_all()
+            self._due_ready.notify_all()
+
+    def _cancel(self, handle: AlarmHandle) -> bool:
+        with self._lock:
+            if handle.state not in (PENDING, GATING):
+                return False
+            was_pending = handle.state == PENDING
+            handle.state = CANCELLED
+            if was_pending:
+                # Left in the heap; dropped when it reaches the top, or by
+                # _compact() once dead entries make up half the heap
+                self._dead += 1
+                if self._dead > len(self._heap) // 2:
+                    self._compact()
+            self._gating.discard(handle)
+            if handle._cancel_event is not None:
+                handle._cancel_event.set()
+            self._wakeup.notify()
+        handle._finish(CANCELLED)
+        return True
+
+    # --- Threads -------------------------------------------------------------
+
+    def _ensure_threads(self):
+        # Called with self._lock held
+        if self._threads:
+            return
+        for target, name in (
+            (self._timer_loop, "enterlater-timer"),
+            (self._injector_loop, "enterlater-injector"),
+        ):
+            t = threading.Thread(target=target, name=name, daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _drop_cancelled(self):
+        # Called with self._lock held
+        while self._heap and self._heap[0][2].state != PENDING:
+            heapq.heappop(self._heap)
+            self._dead -= 1
+
+    def _compact(self):
+        # Called with self._lock held
+        self._heap = [e for e in self._heap if e[2].state == PENDING]
+        heapq.heapify(self._heap)
+        self._dead = 0
+
+    def _timer_loop(self):
+        with self._lock:
+            while not self._stopped:
+                self._drop_cancelled()
+                if not self._heap:
+                    self._wakeup.wait()
+                    continue
+
+                now = datetime.now()
+                remaining = (self._heap[0][0] - now).total_seconds()
+                if remaining > 0:
+                    self._wakeup.wait(min(remaining, MAX_SLEEP))
+                    continue
+
+                # Time reached (even if system slept past it, this runs on wake)
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, handle = heapq.heappop(self._heap)
+                    if handle.state != PENDING:
+                        self._dead -= 1
+                        continue
+                    if handle.gate is not None:
+                        handle.state = GATING
+                        self._gating.add(handle)
+                        threading.Thread(
+                            target=self._gate_worker, args=(handle,),
+                            name="enterlater-gate", daemon=True,
+                        ).start()
+                    else:
+                        handle.state = FIRING
+                        self._due.append(handle)
+                self._due_ready.notify()
+
+    def _gate_worker(self, handle: AlarmHandle):
+        from . import xdotool
+
+        # Live mode: the gate and the keystroke both use the window active now
+        window_id = handle.window_id
+        if window_id is None:
+            window_id = xdotool.get_active_window()
+        handle.target_window_id = window_id
+
+        from .readiness import GateSkipped
+
+        error = None
+        if window_id is None:
+            handle.gate_skipped = "no active window to check"
+        else:
+            try:
+                handle.gated_for, ready = handle.gate.wait(window_id, handle._cancel_event)
+                handle.gate_timed_out = not ready
+            except GateSkipped as e:
+                handle.gate_skipped = str(e)
+            except Exception as e:
+                error = f"Readiness gate error: {e}"
+
+        with self._lock:
+            self._gating.discard(handle)
+            if handle.state != GATING:
+                return  # Cancelled while waiting
+            if error is None:
+                handle.state = FIRING
+                self._due.append(handle)
+                self._due_ready.notify()
+                return
+            handle.state = FAILED
+        handle._finish(FAILED, error)
+
+    def _injector_loop(self):
+        while True:
+            with self._lock:
+                while not self._due and not self._stopped:
+                    self._due_ready.wait()
+                if not self._due:
+                    return
+                batch, self._due = self._due, []
+
+            for handle in batch:
+                self._fire(handle)
+
+    def _fire(self, handle: AlarmHandle):
+        handle.fired_at = datetime.now()
+        try:
+            self.injector(handle)
+        except FileNotFoundError:
+            handle._finish(FAILED, "xdotool not found. Install with: sudo apt install xdotool")
+        except Exception as e:
+            # CalledProcessError from xdotool carries its exit status
+            returncode = getattr(e, "returncode", None)
+            if returncode is not None:
+                message = f"Error sending keys via xdotool (exit {returncode})."
+            else:
+                message = f"Error sending keys: {e}"
+            handle._finish(FAILED, message)
+        else:
+            handle._finish(FIRED)
@@ -0,0 +1,245 @@
+"""
+Pre-fire readiness gating: hold an alarm's keystroke until the target
+window's process is idle and/or its title matches a pattern.
+
+CPU idleness is sampled from /proc/<pid>/stat for the window's process and
+its descendants (so a terminal running a command counts as busy). Title
+changes are streamed by a single `xprop -spy` process instead of polling.
+"""
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+from . import xdotool
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+# cpu_idle used when neither cpu_idle nor title_pattern is given
+DEFAULT_CPU_IDLE = 0.05
+
+
+
+class GateSkipped(Exception):
+    """None of the gate's checks can run for this window (e.g. its PID is unknown)."""
+
+
+_XPROP_LINE = re.compile(r'^(\w+)\([^)]*\) = "(.*)"$')
+
+
+def process_tree_cpu_ticks(pid: int) -> int:
+    """
+    CPU time (clock ticks) used by pid and its live descendants, including
+    children they have already reaped. Raises ProcessLookupError if pid is gone.
+    """
+    total = 0
+    stack = [pid]
+    seen = set()
+    while stack:
+        p = stack.pop()
+        if p in seen:
+            continue
+        seen.add(p)
+
+        try:
+            with open(f"/proc/{p}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            if p == pid:
+                raise ProcessLookupError(pid)
+            continue  # Descendant exited between samples
+
+        # Fields after "(comm)": state is field 3, so utime/stime/cutime/cstime
+        # (fields 14-17) are at offsets 11-14.
+        fields = data[data.rindex(b")") + 2:].split()
+        total += sum(int(x) for x in fields[11:15])
+
+        try:
+            tids = os.listdir(f"/proc/{p}/task")
+        except OSError:
+            continue
+        for tid in tids:
+            try:
+                with open(f"/proc/{p}/task/{tid}/children", "rb") as f:
+                    stack.extend(int(c) for c in f.read().split())
+            except OSError:
+                pass  # Kernel without CONFIG_PROC_CHILDREN: parent only
+
+    return total
+
+
+class _TitleWatcher:
+    """Tracks a window's title from a single long-running `xprop -spy`."""
+
+    def __init__(self, window_id: int):
+        self.window_id = window_id
+        self._titles = {}
+        self._lock = threading.Lock()
+        self._proc = subprocess.Popen(
+            ["xprop", "-spy", "-id", str(window_id), "_NET_WM_NAME", "WM_NAME"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _read_loop(self):
+        for line in self._proc.stdout:
+            m = _XPROP_LINE.match(line.strip())
+            if m:
+                value = m.group(2).replace('\\"', '"').replace("\\\\", "\\")
+                with self._lock:
+                    self._titles[m.group(1)] = value
+
+    def title(self):
+        with self._lock:
+            return self._titles.get("_NET_WM_NAME", self._titles.get("WM_NAME"))
+
+    def close(self):
+        self._proc.terminate()
+        self._proc.wait()
+
+
+def _non_negative(name: str, value) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Readiness gate {name} must be a number, not {value!r}.") from None
+    if value < 0:
+        raise ValueError(f"Readiness gate {name} must not be negative.")
+    return value
+
+
+class ReadinessGate:
+    """
+    Per-alarm readiness condition, evaluated at fire time.
+
+      cpu_idle       Max CPU use (fraction of one core) for the window's
+                     process tree to count as idle. None disables the check;
+                     if title_pattern is also None, DEFAULT_CPU_IDLE is used.
+      idle_for       Seconds the process tree must stay idle.
+      title_pattern  Regex the window title must match. None disables it.
+                     Requires xprop (x11-utils).
+      mode           "any": ready once either enabled check passes.
+                     "all": ready once every enabled check passes.
+      max_wait       Give up waiting and fire anyway after this many seconds.
+      interval       Seconds between CPU samples.
+    """
+
+    def __init__(self, cpu_idle: float = None, idle_for: float = 1.0,
+                 title_pattern: str = None, mode: str = "any",
+                 max_wait: float = 30.0, interval: float = 0.2):
+        if cpu_idle is None and title_pattern is None:
+            cpu_idle = DEFAULT_CPU_IDLE
+        if mode not in ("any", "all"):
+            raise ValueError(f"Readiness gate mode must be 'any' or 'all', not {mode!r}.")
+
+        self.cpu_idle = _non_negative("cpu_idle", cpu_idle) if cpu_idle is not None else None
+        self.idle_for = _non_negative("idle_for", idle_for)
+        self.max_wait = _non_negative("max_wait", max_wait)
+        self.interval = _non_negative("interval", interval)
+        if self.interval == 0:
+            raise ValueError("Readiness gate interval must be positive.")
+        self.mode = mode
+
+        self.title_pattern = None
+        if title_pattern is not None:
+            if shutil.which("xprop") is None:
+                raise ValueError(
+                    "Readiness gate title_pattern requires xprop. "
+                    "Install it with: sudo apt install x11-utils"
+                )
+            try:
+                self.title_pattern = re.compile(title_pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid title_pattern: {e}") from None
+
+    def __repr__(self):
+        pattern = self.title_pattern.pattern if self.title_pattern else None
+        return (
+            f"ReadinessGate(cpu_idle={self.cpu_idle}, idle_for={self.idle_for}, "
+            f"title_pattern={pattern!r}, mode={self.mode!r}, max_wait={self.max_wait})"
+        )
+
+    def _ready(self, cpu_enabled: bool, cpu_ready: bool, title_ready: bool) -> bool:
+        checks = []
+        if cpu_enabled:
+            checks.append(cpu_ready)
+        if self.title_pattern is not None:
+            checks.append(title_ready)
+        return any(checks) if self.mode == "any" else all(checks)
+
+    def wait(self, window_id: int, cancel: threading.Event = None):
+        """
+        Block until the window is ready, max_wait passes, or `cancel` is set.
+        Returns (seconds waited, True if ready / False otherwise).
+
+        The CPU check is dropped if the window's PID is unknown (no
+        _NET_WM_PID). If that leaves no check to run, raises GateSkipped.
+        A process that exits while being watched counts as idle.
+        """
+        if cancel is None:
+            cancel = threading.Event()
+
+        start = time.monotonic()
+        deadline = start + self.max_wait
+
+        pid = None
+        if self.cpu_idle is not None:
+            pid = xdotool.get_window_pid(window_id)
+        cpu_enabled = pid is not None
+        if not cpu_enabled and self.title_pattern is None:
+            raise GateSkipped(f"process of window {window_id} is unknown")
+
+        idle_since = None
+        last_ticks = None
+        last_sample = start
+        cpu_ready = False
+        if cpu_enabled:
+            try:
+                last_ticks = process_tree_cpu_ticks(pid)
+            except ProcessLookupError:
+                # Already exited: nothing left to wait for
+                pid = None
+                cpu_ready = True
+
+        watcher = _TitleWatcher(window_id) if self.title_pattern else None
+
+        try:
+            while True:
+                now = time.monotonic()
+                title_ready = watcher is not None and self._title_matches(watcher.title())
+                if self._ready(cpu_enabled, cpu_ready, title_ready):
+                    return now - start, True
+                if now >= deadline:
+                    return now - start, False
+
+                if cancel.wait(min(self.interval, deadline - now)):
+                    return time.monotonic() - start, False
+
+                if pid is not None:
+                    sample = time.monotonic()
+                    try:
+                        ticks = process_tree_cpu_ticks(pid)
+                    except ProcessLookupError:
+                        pid = None
+                        cpu_ready = True
+                        continue
+                    busy = (ticks - last_ticks) / CLOCK_TICKS / max(sample - last_sample, 1e-6)
+                    if busy <= self.cpu_idle:
+                        if idle_since is None:
+                            idle_since = last_sample
+                        cpu_ready = sample - idle_since >= self.idle_for
+                    else:
+                        idle_since = None
+                        cpu_ready = False
+                    last_ticks = ticks
+                    last_sample = sample
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+    def _title_matches(self, title) -> bool:
+        return title is not None and self.title_pattern.search(title) is not None
@@ -0,0 +1,256 @@
+"""Change-only status export for status bars and external monitors."""
+import json
+import os
+import selectors
+import socket
+import stat
+import tempfile
+import threading
+
+
+def _default_status_dir() -> str:
+    """Per-user directory for the status file and socket."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "enterlater")
+    return os.path.join(tempfile.gettempdir(), f"enterlater-{os.getuid()}")
+
+
+class _Subscriber:
+    """A connected status.sock client and the bytes still owed to it."""
+
+    __slots__ = ("sock", "partial", "pending", "version")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.partial = b""   # Rest of a line already partly sent
+        self.pending = None  # Latest state line, not started yet
+        self.version = 0
+
+
+class StatusExporter:
+    """
+    Publishes alarm state for status bars and external monitors:
+      - status.json: rewritten atomically, only when the state changes
+      - status.sock: Unix stream socket; each subscriber receives the
+        current state on connect, then one JSON line per change
+
+    Socket writes are non-blocking and done by the exporter thread, so
+    publish() never waits on a subscriber. A subscriber that falls behind
+    skips intermediate states and receives only the latest one; lines are
+    never truncated.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or _default_status_dir()
+        self.status_path = os.path.join(self.directory, "status.json")
+        self.socket_path = os.path.join(self.directory, "status.sock")
+
+        self._lock = threading.Lock()
+        self._state = None
+        self._payload = None
+        self._version = 0
+        self._server = None
+        self._wake_r = None
+        self._wake_w = None
+        self._enabled = False
+        self._closed = False
+
+    def start(self):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._check_directory()
+        try:
+            self._server = self._bind_socket()
+        except OSError:
+            # File export still works without the socket
+            self._server = None
+        else:
+            if self._server is None:
+                # Another running instance already exports its state
+                return
+            self._server.setblocking(False)
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._wake_w.setblocking(False)
+            threading.Thread(target=self._serve, daemon=True).start()
+        self._enabled = True
+
+    def _check_directory(self):
+        """Refuse a status directory that another user could read or plant files in."""
+        st = os.lstat(self.directory)
+        if (
+            not stat.S_ISDIR(st.st_mode)
+            or st.st_uid != os.getuid()
+            or stat.S_IMODE(st.st_mode) != 0o700
+        ):
+            raise PermissionError(
+                f"Status directory {self.directory} must be a directory owned "
+                f"by this user with mode 0700."
+            )
+
+    def _bind_socket(self):
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                # Stale socket left behind by a previous run
+                os.unlink(self.socket_path)
+            else:
+                # Another EnterLater instance owns the socket
+                return None
+            finally:
+                probe.close()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(self.socket_path)
+            server.listen(8)
+        except OSError:
+            server.close()
+            raise
+        return server
+
+    # --- Exporter thread -----------------------------------------------------
+
+    def _serve(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self._server, selectors.EVENT_READ)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        subscribers = []
+
+        def drop(sub):
+            selector.unregister(sub.sock)
+            sub.sock.close()
+            subscribers.remove(sub)
+
+        while True:
+            for key, mask in selector.select():
+                if key.fileobj is self._server:
+                    self._accept(selector, subscribers)
+                elif key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif mask & selectors.EVENT_READ:
+                    # Subscribers only listen; readable means EOF or error
+                    sub = key.data
+                    try:
+                        if not sub.sock.recv(4096):
+                            drop(sub)
+                    except BlockingIOError:
+                        pass
+                    except OSError:
+                        drop(sub)
+
+            with self._lock:
+                if self._closed:
+                    break
+                payload, version = self._payload, self._version
+
+            for sub in list(subscribers):
+                if payload is not None and sub.version != version:
+                    # Coalesce: only the latest state is queued
+                    sub.pending, sub.version = payload, version
+                if not self._flush(selector, sub):
+                    drop(sub)
+
+        for sub in subscribers:
+            sub.sock.close()
+        selector.close()
+        self._server.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _accept(self, selector, subscribers):
+        try:
+            conn, _ = self._server.accept()
+        except (BlockingIOError, OSError):
+            return
+        conn.setblocking(False)
+        sub = _Subscriber(conn)
+        subscribers.append(sub)
+        selector.register(conn, selectors.EVENT_READ, sub)
+
+    def _flush(self, selector, sub: _Subscriber) -> bool:
+        """Send what the socket takes without blocking. Returns False if it is dead."""
+        while True:
+            if not sub.partial:
+                if sub.pending is None:
+                    break
+                sub.partial, sub.pending = sub.pending, None
+            try:
+                sent = sub.sock.send(sub.partial)
+            except BlockingIOError:
+                break
+            except OSError:
+                return False
+            sub.partial = sub.partial[sent:]
+
+        events = selectors.EVENT_READ
+        if sub.partial or sub.pending is not None:
+            events |= selectors.EVENT_WRITE
+        selector.modify(sub.sock, events, sub)
+        return True
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass  # Wake byte already pending, or exporter shut down
+
+    # --- Publishing ----------------------------------------------------------
+
+    def publish(self, state: dict) -> bool:
+        """Export state if it differs from the last one. Returns True if exported."""
+        with self._lock:
+            if not self._enabled or state == self._state:
+                return False
+            self._state = dict(state)
+            self._payload = (json.dumps(state, sort_keys=True) + "\n").encode("utf-8")
+            self._version += 1
+
+            self._write_status_file(self._payload)
+
+        if self._wake_w is not None:
+            self._wake()
+        return True
+
+    def _write_status_file(self, payload: bytes):
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.directory, prefix=".status-", suffix=".tmp"
+            )
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.status_path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            if not self._enabled:
+                return
+            self._enabled = False
+            self._closed = True
+
+            if self._server is not None:
+                self._wake()
+                try:
+                    os.unlink(self.socket_path)
+                except OSError:
+                    pass
+
+            # No status file means EnterLater is not running
+            try:
+                os.unlink(self.status_path)
+            except OSError:
+                pass
@@ -0,0 +1,94 @@
+"""Thin wrappers around the xdotool commands EnterLater relies on."""
+import subprocess
+
+
+def _run(*args: str) -> str:
+    """Run a command and return its stripped stdout. Raises CalledProcessError."""
+    proc = subprocess.run(
+        list(args),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        check=True,
+        text=True,
+    )
+    return proc.stdout.strip()
+
+
+def available() -> bool:
+    try:
+        subprocess.run(
+            ["xdotool", "--version"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def get_active_window():
+    try:
+        win_id_str = _run("xdotool", "getactivewindow")
+        return int(win_id_str) if win_id_str else None
+    except (subprocess.CalledProcessError, ValueError, FileNotFoundError):
+        return None
+
+
+def find_window_by_name(pattern: str):
+    """First window whose name matches the regex pattern, if any."""
+    try:
+        # May return multiple lines; take the first
+        win_id_str = _run("xdotool", "search", "--name", pattern).split("\n")[0]
+        return int(win_id_str) if win_id_str else None
+    except (subprocess.CalledProcessError, ValueError, FileNotFoundError):
+        return None
+
+
+def get_window_name(window_id: int):
+    try:
+        return _run("xdotool", "getwindowname", str(window_id)) or None
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def get_window_pid(window_id: int):
+    try:
+        pid_str = _run("xdotool", "getwindowpid", str(window_id))
+        return int(pid_str) if pid_str else None
+    except (subprocess.CalledProcessError, ValueError, FileNotFoundError):
+        return None
+
+
+def describe_window_process(window_id: int):
+    """e.g. 'bash (PID 1234)', or None if the process cannot be determined."""
+    pid = get_window_pid(window_id)
+    if pid is None:
+        return None
+    try:
+        pname = _run("ps", "-p", str(pid), "-o", "comm=")
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    return f"{pname} (PID {pid})" if pname else None
+
+
+def activate_window(window_id: int) -> bool:
+    try:
+        subprocess.run(
+            ["xdotool", "windowactivate", "--sync", str(window_id)],
+            check=True
+        )
+        return True
+    except subprocess.CalledProcessError:
+        return False
+
+
+def send_keys(text: str = "", press_enter: bool = True):
+    """
+    Type text (if any), then press Enter.
+    Raises CalledProcessError / FileNotFoundError from xdotool.
+    """
+    if text:
+        subprocess.run(["xdotool", "type", "--delay", "0", text], check=True)
+    if press_enter:
+        subprocess.run(["xdotool", "key", "Return"], check=True)
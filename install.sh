@@ -48,6 +48,9 @@ if [ "$SCRIPT_DIR" != "$INSTALL_DIR" ]; then
     mkdir -p "$INSTALL_DIR"
     cp "$SCRIPT_DIR/EnterLater.py" "$INSTALL_DIR/"
     cp "$SCRIPT_DIR/enterlater.png" "$INSTALL_DIR/"
+    rm -rf "$INSTALL_DIR/enterlater"
+    mkdir -p "$INSTALL_DIR/enterlater"
+    cp "$SCRIPT_DIR"/enterlater/*.py "$INSTALL_DIR/enterlater/"
     if [ -f "$SCRIPT_DIR/README.md" ]; then
         cp "$SCRIPT_DIR/README.md" "$INSTALL_DIR/"
     fi